@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Embedding Model ONNX Export Script
+
+Exports the configured sentence-transformers model to ONNX, applies O3 graph
+optimization and int8 dynamic quantization, and writes the result where the
+memory service loads it when EMBEDDING_BACKEND=onnx.
+
+Requires: pip install "optimum[onnxruntime]"
+"""
+
+import argparse
+import sys
+import os
+import logging
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.api.core.config import settings
+from services.api.services.onnx_embedder import ONNX_MODEL_FILE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def export_embedding_model(model_name: str, output_dir: str):
+    """Export, optimize and quantize the embedding model into output_dir"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTOptimizer
+    from optimum.onnxruntime.configuration import AutoOptimizationConfig
+    from transformers import AutoTokenizer
+
+    # Bare names from config refer to the sentence-transformers organization
+    model_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    logger.info(f"📦 Exporting {model_id} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+
+    logger.info("⚙️ Applying O3 graph optimization...")
+    optimizer = ORTOptimizer.from_pretrained(model)
+    optimizer.optimize(save_dir=output_dir, optimization_config=AutoOptimizationConfig.O3())
+
+    logger.info("🔢 Applying int8 dynamic quantization...")
+    quantize_dynamic(
+        os.path.join(output_dir, "model_optimized.onnx"),
+        os.path.join(output_dir, ONNX_MODEL_FILE),
+        weight_type=QuantType.QInt8
+    )
+
+    logger.info(f"✅ ONNX embedding model written to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX Runtime")
+    parser.add_argument("--model", default=settings.embedding_model_name, help="Model name or Hugging Face id")
+    parser.add_argument("--output-dir", default=settings.embedding_onnx_dir, help="Directory for the exported model")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    export_embedding_model(args.model, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -96,7 +96,7 @@ class MemorySystemVerifier:
                 return False
 
             # Test basic operation
-            collections = qdrant.get_collections()
+            collections = await qdrant.get_collections()
             logger.info(f"✅ Qdrant connection successful (collections: {len(collections.collections)})")
 
             self.verification_results["qdrant_connection"] = True
@@ -119,7 +119,7 @@ class MemorySystemVerifier:
                 logger.error("❌ Cannot verify collection: Qdrant not available")
                 return False
 
-            collections = qdrant.get_collections().collections
+            collections = (await qdrant.get_collections()).collections
             collection_exists = any(
                 collection.name == settings.qdrant_collection_name
                 for collection in collections
@@ -127,11 +127,10 @@ class MemorySystemVerifier:
 
             if not collection_exists:
                 logger.info(f"📝 Creating collection: {settings.qdrant_collection_name}")
-                # The MemoryService constructor should create the collection
-                memory_service._init_qdrant_collection()
+                await memory_service._init_qdrant_collection()
 
                 # Verify creation
-                collections = qdrant.get_collections().collections
+                collections = (await qdrant.get_collections()).collections
                 collection_exists = any(
                     collection.name == settings.qdrant_collection_name
                     for collection in collections
@@ -142,7 +141,7 @@ class MemorySystemVerifier:
                     return False
 
             # Check collection configuration
-            collection_info = qdrant.get_collection(settings.qdrant_collection_name)
+            collection_info = await qdrant.get_collection(settings.qdrant_collection_name)
             assert collection_info.config.params.vectors.size == settings.embedding_dimension, \
                 f"Collection vector dimension mismatch: expected {settings.embedding_dimension}, got {collection_info.config.params.vectors.size}"
 
@@ -198,7 +197,7 @@ class MemorySystemVerifier:
 
             # Verify storage (check collection count)
             qdrant = get_qdrant()
-            collection_info = qdrant.get_collection(settings.qdrant_collection_name)
+            collection_info = await qdrant.get_collection(settings.qdrant_collection_name)
 
             # Clean up test data
             await memory_service.delete_conversation_memory(test_conversation_id)
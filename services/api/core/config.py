@@ -15,6 +15,11 @@ class Settings(BaseSettings):
     # Qdrant (Vector Database)
     qdrant_url: str = "http://localhost:6333"
     qdrant_collection_name: str = "conversations"
+    # Embeddings are L2-normalized at ingest, so Dot equals cosine similarity without
+    # server-side re-normalization; set to "Cosine" for collections created before
+    qdrant_distance: str = "Dot"
+    # int8 scalar quantization of stored vectors, with rescoring on search; set to False to roll back
+    qdrant_quantization: bool = True
 
     # Fuseki (Knowledge Graph)
     fuseki_url: str = "http://localhost:3030"
@@ -47,19 +52,26 @@ class Settings(BaseSettings):
     # Safety Settings
     safety_filter_enabled: bool = True
     max_response_time: int = 10  # seconds
+    safety_result_cache_size: int = 1024  # Recent safety check results kept LRU-first
+    safety_offload_min_chars: int = 2000  # Longer content is scanned in a worker thread
+    safety_short_circuit: bool = True  # Skip complexity/emotional checks after a high-severity violation
 
     # Background Tasks
     enable_background_extraction: bool = True
     extraction_batch_size: int = 10
+    extraction_max_jobs: int = 10000  # Finished jobs beyond this are evicted LRU-first
 
     # Embedding Configuration
     embedding_model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"
     embedding_dimension: int = 384
     embedding_batch_size: int = 32
     embedding_max_length: int = 512
+    embedding_backend: str = "torch"  # "torch" or "onnx" (see scripts/export_embedding_onnx.py)
+    embedding_onnx_dir: str = "models/embedding_onnx"
     enable_semantic_search: bool = True
     semantic_search_limit: int = 5
     context_retrieval_limit: int = 3
+    query_embedding_cache_size: int = 1024  # Recent query embeddings kept LRU-first
 
     class Config:
         env_file = ".env"
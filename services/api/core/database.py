@@ -1,6 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType
+)
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
@@ -14,7 +17,10 @@ mongodb_client: Optional[AsyncIOMotorClient] = None
 database = None
 
 # Qdrant connection
-qdrant_client: Optional[QdrantClient] = None
+qdrant_client: Optional[AsyncQdrantClient] = None
+
+# Payload fields filtered on and aggregated server-side (facet) in the conversations collection
+QDRANT_KEYWORD_INDEX_FIELDS = ("child_id", "conversation_id", "topic", "role", "emotion")
 
 async def init_db():
     """Initialize database connections"""
@@ -29,7 +35,7 @@ async def init_db():
         await setup_mongodb_collections()
 
         # Initialize Qdrant
-        qdrant_client = QdrantClient(settings.qdrant_url)
+        qdrant_client = AsyncQdrantClient(settings.qdrant_url, prefer_grpc=True)
         await setup_qdrant_collections()
 
         logger.info("Database connections initialized successfully")
@@ -68,14 +74,31 @@ async def setup_mongodb_collections():
         logger.error(f"Failed to setup MongoDB collections: {e}")
         raise
 
+def get_qdrant_quantization_config() -> Optional[ScalarQuantization]:
+    """Get the int8 scalar quantization config for new collections, None when disabled"""
+    if not settings.qdrant_quantization:
+        return None
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+    )
+
 async def setup_qdrant_collections():
     """Setup Qdrant collections for vector search"""
     try:
         # Conversations collection for semantic search
-        if not qdrant_client.collection_exists(settings.qdrant_collection_name):
-            qdrant_client.create_collection(
+        if not await qdrant_client.collection_exists(settings.qdrant_collection_name):
+            await qdrant_client.create_collection(
+                collection_name=settings.qdrant_collection_name,
+                vectors_config=VectorParams(size=384, distance=Distance(settings.qdrant_distance)),
+                quantization_config=get_qdrant_quantization_config()
+            )
+
+        # Index creation is idempotent, so existing collections are brought up to date as well
+        for field_name in QDRANT_KEYWORD_INDEX_FIELDS:
+            await qdrant_client.create_payload_index(
                 collection_name=settings.qdrant_collection_name,
-                vectors_config=VectorParams(size=384, distance=Distance.COSINE)
+                field_name=field_name,
+                field_schema="keyword"
             )
 
         logger.info("Qdrant collections created successfully")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Any, Optional, Literal
 from datetime import datetime
 from enum import Enum
@@ -25,6 +25,8 @@ class RelationshipType(str, Enum):
 
 class ExtractedEntity(BaseModel):
     """Represents an entity extracted from conversation"""
+    model_config = ConfigDict(frozen=True)
+
     text: str = Field(..., description="The entity text as it appears in conversation")
     type: EntityType = Field(..., description="The type of entity")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score from extraction")
@@ -33,8 +35,14 @@ class ExtractedEntity(BaseModel):
     normalized_form: Optional[str] = Field(None, description="Normalized/canonical form of entity")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
+class EntityExtractionOutput(BaseModel):
+    """Structured LLM output for entity extraction"""
+    entities: List[ExtractedEntity] = Field(default_factory=list)
+
 class ExtractedRelationship(BaseModel):
     """Represents a relationship between entities"""
+    model_config = ConfigDict(frozen=True)
+
     subject: str = Field(..., description="Subject entity identifier")
     predicate: RelationshipType = Field(..., description="Relationship type")
     object: str = Field(..., description="Object entity identifier")
@@ -56,6 +64,8 @@ class ExtractionResult(BaseModel):
 
 class RDFTriple(BaseModel):
     """RDF triple representation"""
+    model_config = ConfigDict(frozen=True)
+
     subject: str
     predicate: str
     object: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
@@ -138,6 +138,9 @@ class SystemInfo(BaseModel):
 
 # Safety
 class SafetyViolation(BaseModel):
+    # Immutable so cached safety results can share violations without copying them
+    model_config = ConfigDict(frozen=True)
+
     type: str
     severity: Literal["low", "medium", "high"]
     description: str
@@ -117,7 +117,7 @@ async def cleanup_extraction_job(job_id: str):
         )
 
     # Remove from active jobs
-    del extraction_service.active_jobs[job_id]
+    extraction_service.remove_job(job_id)
 
     return {
         "job_id": job_id,
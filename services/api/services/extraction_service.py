@@ -1,13 +1,15 @@
 import logging
 import json
+import time
 import uuid
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from collections import OrderedDict
 import asyncio
 from pydantic import ValidationError
 
 from ..models.extraction_models import (
-    ExtractedEntity, ExtractedRelationship, ExtractionResult,
+    ExtractedEntity, ExtractedRelationship, ExtractionResult, EntityExtractionOutput,
     RDFTriple, ValidationReport, ExtractionJob, EntityType, RelationshipType
 )
 from ..models.schemas import Message
@@ -16,14 +18,134 @@ from ..routers.knowledge_graph import insert_knowledge, validate_knowledge_graph
 from ..core.config import settings
 from ..core.database import get_db
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Minimum confidence for extracted entities and relationships
+MIN_CONFIDENCE = 0.7
+
+# Conversations with less message text than this skip the LLM entirely
+MIN_EXTRACTION_TEXT_LENGTH = 20
+
+# RDF classes and predicates for extracted entity and relationship types
+_ENTITY_TYPE_TO_RDF: Dict[EntityType, str] = {
+    EntityType.PERSON: "emo:Person",
+    EntityType.PLACE: "emo:Place",
+    EntityType.ACTIVITY: "emo:Activity",
+    EntityType.EMOTION: "emo:Emotion",
+    EntityType.TOPIC: "emo:Topic",
+    EntityType.OBJECT: "emo:Object",
+    EntityType.CONCEPT: "emo:Concept"
+}
+
+_RELATIONSHIP_TYPE_TO_RDF: Dict[RelationshipType, str] = {
+    RelationshipType.LIKES: "emo:likes",
+    RelationshipType.DISLIKES: "emo:dislikes",
+    RelationshipType.PART_OF: "emo:partOf",
+    RelationshipType.RELATED_TO: "emo:relatedTo",
+    RelationshipType.EXPERIENCED: "emo:experienced",
+    RelationshipType.MENTIONED: "emo:mentioned",
+    RelationshipType.FEELS: "emo:feels",
+    RelationshipType.KNOWS: "emo:knows",
+    RelationshipType.DOES: "emo:does"
+}
+
+# Extraction instructions are identical across calls, so they are sent as a
+# fixed system prompt ahead of the conversation text. Keeping them as the
+# prompt prefix lets the LLM backend reuse its cached prefix.
+ENTITY_EXTRACTION_SYSTEM_PROMPT = f"""Extrae entidades del texto de una conversación con un niño con TEA2.
+
+Identifica entidades de los siguientes tipos:
+- person: personas (amigos, familiares, maestros)
+- place: lugares (colegio, parque, casa)
+- activity: actividades (jugar, estudiar, comer)
+- emotion: emociones (feliz, triste, enojado)
+- topic: temas (matemáticas, recreo)
+- object: objetos (juguete, libro)
+- concept: conceptos abstractos (amistad, aprendizaje)
+
+Responde en formato JSON con esta estructura:
+{{
+    "entities": [
+        {{
+            "text": "texto exacto de la entidad",
+            "type": "tipo de entidad",
+            "confidence": 0.95,
+            "start_pos": posición_inicio,
+            "end_pos": posición_fin,
+            "normalized_form": "forma normalizada"
+        }}
+    ]
+}}
+
+Solo incluye entidades con confianza >= {MIN_CONFIDENCE}."""
+
+RELATIONSHIP_EXTRACTION_SYSTEM_PROMPT = f"""Extrae relaciones entre las entidades indicadas del texto de conversación.
+
+Tipos de relaciones permitidas:
+- likes: le gusta
+- dislikes: no le gusta
+- part_of: parte de
+- related_to: relacionado con
+- experienced: experimentó
+- mentioned: mencionó
+- feels: siente
+- knows: conoce
+- does: hace
+
+Responde en formato JSON:
+{{
+    "relationships": [
+        {{
+            "subject": "índice de entidad sujeto",
+            "predicate": "tipo de relación",
+            "object": "índice de entidad objeto",
+            "confidence": 0.9,
+            "source_text": "texto original donde se encuentra",
+            "context": "contexto circundante"
+        }}
+    ]
+}}
+
+Solo incluye relaciones con confianza >= {MIN_CONFIDENCE}."""
+
+
+def _meets_confidence(item_data: Any, threshold: float) -> bool:
+    """Check the raw confidence of an LLM item before building its model.
+
+    Items whose confidence cannot be read are kept so that model
+    validation reports them.
+    """
+    try:
+        return float(item_data.get("confidence", 0)) >= threshold
+    except (AttributeError, TypeError, ValueError):
+        return True
+
+
+def _loads_llm_json(response: str) -> Any:
+    """Parse a JSON LLM response, using orjson when it is installed.
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers only
+    need to handle the stdlib exception.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response)
+    return json.loads(response)
+
 class ExtractionService:
     """Service for extracting entities and relationships from conversations"""
 
     def __init__(self):
         self.llm_service = LLMService()
-        self.active_jobs: Dict[str, ExtractionJob] = {}
+        # Keyed by UUID; string job ids are only used at the API boundary.
+        # Ordered by recency of use so finished jobs can be evicted LRU-first.
+        self.active_jobs: "OrderedDict[uuid.UUID, ExtractionJob]" = OrderedDict()
+        self.max_jobs = settings.extraction_max_jobs
 
     async def extract_entities_from_conversation(
         self,
@@ -34,7 +156,23 @@ class ExtractionService:
         """
         Extract entities and relationships from conversation messages using LLM
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
+
+        # Trivially short conversations cannot yield useful entities, so
+        # avoid the LLM round-trips altogether
+        text_length = sum(len(msg.text.strip()) for msg in conversation_messages)
+        if text_length < MIN_EXTRACTION_TEXT_LENGTH:
+            logger.info(f"Skipping extraction for conversation {conversation_id}: "
+                        f"only {text_length} characters of text")
+            return ExtractionResult(
+                conversation_id=conversation_id,
+                child_id=child_id,
+                entities=[],
+                relationships=[],
+                processing_time_ms=0,
+                model_used="skipped",
+                confidence_threshold=MIN_CONFIDENCE
+            )
 
         try:
             # Combine conversation messages into full text
@@ -50,16 +188,16 @@ class ExtractionService:
                 conversation_text, entities, child_id, conversation_id
             )
 
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
             result = ExtractionResult(
                 conversation_id=conversation_id,
                 child_id=child_id,
                 entities=entities,
                 relationships=relationships,
-                processing_time_ms=int(processing_time),
+                processing_time_ms=processing_time_ms,
                 model_used=settings.llm_model_name,
-                confidence_threshold=0.7
+                confidence_threshold=MIN_CONFIDENCE
             )
 
             logger.info(f"Extraction completed for conversation {conversation_id}: "
@@ -87,65 +225,55 @@ class ExtractionService:
     ) -> List[ExtractedEntity]:
         """Extract entities using LLM with structured output"""
 
-        prompt = f"""
-        Extrae entidades del siguiente texto de una conversación con un niño con TEA2.
+        prompt = f'Texto: "{text}"'
 
-        Texto: "{text}"
+        try:
+            # Get response from LLM
+            response = await self.llm_service.generate_response(
+                prompt, system_prompt=ENTITY_EXTRACTION_SYSTEM_PROMPT
+            )
 
-        Identifica entidades de los siguientes tipos:
-        - person: personas (amigos, familiares, maestros)
-        - place: lugares (colegio, parque, casa)
-        - activity: actividades (jugar, estudiar, comer)
-        - emotion: emociones (feliz, triste, enojado)
-        - topic: temas (matemáticas, recreo)
-        - object: objetos (juguete, libro)
-        - concept: conceptos abstractos (amistad, aprendizaje)
+            return self._parse_entities_response(response)
 
-        Responde en formato JSON con esta estructura:
-        {{
-            "entities": [
-                {{
-                    "text": "texto exacto de la entidad",
-                    "type": "tipo de entidad",
-                    "confidence": 0.95,
-                    "start_pos": posición_inicio,
-                    "end_pos": posición_fin,
-                    "normalized_form": "forma normalizada"
-                }}
-            ]
-        }}
+        except Exception as e:
+            logger.error(f"Error in LLM entity extraction: {e}")
+            return []
 
-        Solo incluye entidades con confianza >= 0.7.
-        """
+    def _parse_entities_response(self, response: str) -> List[ExtractedEntity]:
+        """Parse and validate an entity extraction response.
 
+        Well-formed responses are parsed and validated in a single pass;
+        anything else falls back to per-item validation so that valid
+        entities survive alongside invalid ones.
+        """
+        threshold = MIN_CONFIDENCE
         try:
-            # Get response from LLM
-            response = await self.llm_service.generate_response(prompt)
+            output = EntityExtractionOutput.model_validate_json(response)
+            return [entity for entity in output.entities if entity.confidence >= threshold]
+        except ValidationError:
+            pass
 
-            # Parse JSON response
+        # Parse JSON response
+        try:
+            llm_result = _loads_llm_json(response)
+            entities_data = llm_result.get("entities", [])
+        except (json.JSONDecodeError, AttributeError):
+            logger.warning(f"Failed to parse LLM response as JSON: {response}")
+            entities_data = []
+
+        # Convert to ExtractedEntity objects, skipping low-confidence
+        # items before paying for model validation
+        entities = []
+        for entity_data in entities_data:
+            if not _meets_confidence(entity_data, threshold):
+                continue
             try:
-                llm_result = json.loads(response)
-                entities_data = llm_result.get("entities", [])
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse LLM response as JSON: {response}")
-                entities_data = []
+                entities.append(ExtractedEntity(**entity_data))
+            except (ValidationError, TypeError) as e:
+                logger.warning(f"Invalid entity data: {entity_data}, error: {e}")
+                continue
 
-            # Convert to ExtractedEntity objects
-            entities = []
-            for entity_data in entities_data:
-                try:
-                    entity = ExtractedEntity(**entity_data)
-                    if entity.confidence >= 0.7:
-                        entities.append(entity)
-                except ValidationError as e:
-                    logger.warning(f"Invalid entity data: {entity_data}, error: {e}")
-                    continue
-
-            return entities
-
-        except Exception as e:
-            logger.error(f"Error in LLM entity extraction: {e}")
-            return []
+        return entities
 
     async def _extract_relationships_llm(
         self,
@@ -159,66 +287,36 @@ class ExtractionService:
         # Create entity lookup
         entity_lookup = {i: entity.text for i, entity in enumerate(entities)}
 
-        prompt = f"""
-        Extrae relaciones entre las siguientes entidades del texto de conversación.
-
-        Entidades:
-        {json.dumps(entity_lookup, indent=2, ensure_ascii=False)}
-
-        Texto: "{text}"
-
-        Tipos de relaciones permitidas:
-        - likes: le gusta
-        - dislikes: no le gusta
-        - part_of: parte de
-        - related_to: relacionado con
-        - experienced: experimentó
-        - mentioned: mencionó
-        - feels: siente
-        - knows: conoce
-        - does: hace
-
-        Responde en formato JSON:
-        {{
-            "relationships": [
-                {{
-                    "subject": "índice de entidad sujeto",
-                    "predicate": "tipo de relación",
-                    "object": "índice de entidad objeto",
-                    "confidence": 0.9,
-                    "source_text": "texto original donde se encuentra",
-                    "context": "contexto circundante"
-                }}
-            ]
-        }}
-
-        Solo incluye relaciones con confianza >= 0.7.
-        """
+        entities_json = json.dumps(entity_lookup, indent=2, ensure_ascii=False)
+        prompt = f'Entidades:\n{entities_json}\n\nTexto: "{text}"'
 
         try:
             # Get response from LLM
-            response = await self.llm_service.generate_response(prompt)
+            response = await self.llm_service.generate_response(
+                prompt, system_prompt=RELATIONSHIP_EXTRACTION_SYSTEM_PROMPT
+            )
 
             # Parse JSON response
             try:
-                llm_result = json.loads(response)
+                llm_result = _loads_llm_json(response)
                 relationships_data = llm_result.get("relationships", [])
             except json.JSONDecodeError:
                 logger.warning(f"Failed to parse LLM relationships response as JSON: {response}")
                 relationships_data = []
 
             # Convert to ExtractedRelationship objects
+            threshold = MIN_CONFIDENCE
             relationships = []
             for rel_data in relationships_data:
+                if not _meets_confidence(rel_data, threshold):
+                    continue
                 try:
                     # Convert entity indices to actual entity texts
                     if rel_data["subject"] in entity_lookup and rel_data["object"] in entity_lookup:
                         rel_data["subject"] = entity_lookup[rel_data["subject"]]
                         rel_data["object"] = entity_lookup[rel_data["object"]]
 
-                        relationship = ExtractedRelationship(**rel_data)
-                        if relationship.confidence >= 0.7:
-                            relationships.append(relationship)
+                        relationships.append(ExtractedRelationship(**rel_data))
                 except (ValidationError, KeyError) as e:
                     logger.warning(f"Invalid relationship data: {rel_data}, error: {e}")
                     continue
@@ -263,21 +361,13 @@ class ExtractionService:
             entity_uri = f"{base_uri}entity/{conversation_id}_{i}"
 
             # Entity type
-            entity_type_mapping = {
-                EntityType.PERSON: "emo:Person",
-                EntityType.PLACE: "emo:Place",
-                EntityType.ACTIVITY: "emo:Activity",
-                EntityType.EMOTION: "emo:Emotion",
-                EntityType.TOPIC: "emo:Topic",
-                EntityType.OBJECT: "emo:Object",
-                EntityType.CONCEPT: "emo:Concept"
-            }
-
-            if entity.type in entity_type_mapping:
+            entity_class = _ENTITY_TYPE_TO_RDF.get(entity.type)
+
+            if entity_class:
                 triples.append(RDFTriple(
                     subject=entity_uri,
                     predicate="rdf:type",
-                    object=entity_type_mapping[entity.type]
+                    object=entity_class
                 ))
 
                 # Entity label
@@ -302,22 +392,12 @@ class ExtractionService:
 
             if subject_uri and object_uri:
                 # Map relationship types to predicates
-                predicate_mapping = {
-                    RelationshipType.LIKES: "emo:likes",
-                    RelationshipType.DISLIKES: "emo:dislikes",
-                    RelationshipType.PART_OF: "emo:partOf",
-                    RelationshipType.RELATED_TO: "emo:relatedTo",
-                    RelationshipType.EXPERIENCED: "emo:experienced",
-                    RelationshipType.MENTIONED: "emo:mentioned",
-                    RelationshipType.FEELS: "emo:feels",
-                    RelationshipType.KNOWS: "emo:knows",
-                    RelationshipType.DOES: "emo:does"
-                }
-
-                if relationship.predicate in predicate_mapping:
+                predicate = _RELATIONSHIP_TYPE_TO_RDF.get(relationship.predicate)
+
+                if predicate:
                     triples.append(RDFTriple(
                         subject=subject_uri,
-                        predicate=predicate_mapping[relationship.predicate],
+                        predicate=predicate,
                         object=object_uri
                     ))
 
@@ -361,30 +441,52 @@ class ExtractionService:
 
     def _convert_triples_to_sparql(self, triples: List[RDFTriple]) -> str:
         """Convert RDF triples to SPARQL INSERT format"""
-        insert_statements = []
-
-        for triple in triples:
-            if triple.graph:
-                insert_statements.append(
-                    f"GRAPH <{triple.graph}> {{ <{triple.subject}> <{triple.predicate}> {triple.object} . }}"
-                )
-            else:
-                insert_statements.append(
-                    f"<{triple.subject}> <{triple.predicate}> {triple.object} ."
-                )
+        subjects, predicates, objects, graphs = self._triples_to_soa(triples)
+
+        # Format each column in one pass, then build every statement line
+        # once and join in a single pass
+        format_term = self._format_rdf_term
+        insert_statements = [
+            f"{s} {p} {o} ."
+            for s, p, o in zip(
+                map(format_term, subjects),
+                map(format_term, predicates),
+                map(format_term, objects)
+            )
+        ]
+        for i, graph in enumerate(graphs):
+            if graph:
+                insert_statements[i] = f"GRAPH <{graph}> {{ {insert_statements[i]} }}"
 
-        separator = " .\n            "
-        joined_statements = separator.join(insert_statements)
+        joined_statements = "\n            ".join(insert_statements)
         return f"""
         PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX emo: <https://emorobcare.org/ontology#>
 
         INSERT DATA {{
-            { joined_statements }
+            {joined_statements}
         }}
         """
 
+    @staticmethod
+    def _triples_to_soa(
+        triples: List[RDFTriple]
+    ) -> Tuple[List[str], List[str], List[str], List[Optional[str]]]:
+        """Split triples into parallel subject/predicate/object/graph columns"""
+        subjects = [triple.subject for triple in triples]
+        predicates = [triple.predicate for triple in triples]
+        objects = [triple.object for triple in triples]
+        graphs = [triple.graph for triple in triples]
+        return subjects, predicates, objects, graphs
+
+    @staticmethod
+    def _format_rdf_term(term: str) -> str:
+        """Wrap absolute URIs in angle brackets; keep prefixed names and literals as-is"""
+        if term.startswith(("http://", "https://")):
+            return f"<{term}>"
+        return term
+
     async def process_extraction_job(
         self,
         job_id: str,
@@ -394,7 +496,7 @@ class ExtractionService:
     ) -> ExtractionJob:
         """Process a background extraction job"""
 
-        job = self.active_jobs.get(job_id)
+        job = self.get_job_status(job_id)
         if not job:
             raise ValueError(f"Job {job_id} not found")
 
@@ -445,7 +547,8 @@ class ExtractionService:
 
     def create_extraction_job(self, conversation_id: str, child_id: str) -> str:
         """Create a new background extraction job"""
-        job_id = str(uuid.uuid4())
+        job_uuid = uuid.uuid4()
+        job_id = str(job_uuid)
 
         job = ExtractionJob(
             job_id=job_id,
@@ -454,11 +557,49 @@ class ExtractionService:
             status="pending"
         )
 
-        self.active_jobs[job_id] = job
+        self.active_jobs[job_uuid] = job
+        self._evict_finished_jobs()
         logger.info(f"Created extraction job {job_id} for conversation {conversation_id}")
 
         return job_id
 
     def get_job_status(self, job_id: str) -> Optional[ExtractionJob]:
         """Get status of an extraction job"""
-        return self.active_jobs.get(job_id)
+        job_uuid = self._parse_job_id(job_id)
+        if job_uuid is None:
+            return None
+        job = self.active_jobs.get(job_uuid)
+        if job is not None:
+            self.active_jobs.move_to_end(job_uuid)
+        return job
+
+    def remove_job(self, job_id: str) -> Optional[ExtractionJob]:
+        """Remove an extraction job, returning it if it existed"""
+        job_uuid = self._parse_job_id(job_id)
+        if job_uuid is None:
+            return None
+        return self.active_jobs.pop(job_uuid, None)
+
+    def _evict_finished_jobs(self) -> None:
+        """Drop least recently used finished jobs while over max_jobs.
+
+        Pending and processing jobs are never evicted.
+        """
+        excess = len(self.active_jobs) - self.max_jobs
+        if excess <= 0:
+            return
+
+        evictable = [
+            job_uuid for job_uuid, job in self.active_jobs.items()
+            if job.status in ("completed", "failed")
+        ][:excess]
+        for job_uuid in evictable:
+            del self.active_jobs[job_uuid]
+
+    @staticmethod
+    def _parse_job_id(job_id: str) -> Optional[uuid.UUID]:
+        """Convert an API job id to its UUID key, or None if malformed"""
+        try:
+            return uuid.UUID(job_id)
+        except (ValueError, TypeError, AttributeError):
+            return None
@@ -66,6 +66,7 @@ class LLMService:
                 enforce_eager=True,  # For better compatibility
                 disable_log_stats=True,  # Reduce log noise
                 max_num_batched_tokens=1024,  # Optimized batch size
+                enable_prefix_caching=True,  # Reuse KV blocks of shared system prompts
             )
 
             # Test the model with a simple generation
@@ -105,9 +106,14 @@ class LLMService:
         prompt: str,
         conversation_history: List[Dict[str, str]] = None,
         child_profile: Dict[str, Any] = None,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        system_prompt: Optional[str] = None
     ) -> str:
-        """Generate a response from the LLM with safety validation"""
+        """Generate a response from the LLM with safety validation
+
+        A fixed ``system_prompt`` replaces the child-profile system prompt and
+        is placed first, so repeated calls share a cacheable prompt prefix.
+        """
         try:
             if not self.model_ready:
                 return self._get_fallback_response()
@@ -117,7 +123,8 @@ class LLMService:
                 prompt,
                 conversation_history,
                 child_profile,
-                context
+                context,
+                system_prompt
             )
 
             # Generate raw response
@@ -157,11 +164,13 @@ class LLMService:
         user_input: str,
         conversation_history: List[Dict[str, str]] = None,
         child_profile: Dict[str, Any] = None,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        system_prompt: Optional[str] = None
     ) -> str:
         """Build the complete prompt for the LLM"""
         # System prompt
-        system_prompt = self._get_system_prompt(child_profile)
+        if system_prompt is None:
+            system_prompt = self._get_system_prompt(child_profile)
 
         # Add conversation history
         history_text = ""
@@ -1,14 +1,53 @@
+import asyncio
+import functools
 import logging
+import re
+import time
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
-from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import (
+    PointStruct, Filter, FieldCondition, MatchValue, SearchParams, QuantizationSearchParams
+)
 
 from ..core.config import settings
-from ..core.database import get_qdrant, get_db
+from ..core.database import (
+    get_qdrant, get_db, get_qdrant_quantization_config, QDRANT_KEYWORD_INDEX_FIELDS
+)
+from .onnx_embedder import ONNXEmbedder, ONNX_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
+# Emotion markup patterns stripped before embedding
+_BOLD_MARKUP_RE = re.compile(r'\*\*(.*?)\*\*')
+_UNDERSCORE_MARKUP_RE = re.compile(r'__(.*?)__')
+
+
+@functools.lru_cache(maxsize=2048)
+def _build_filter(
+    child_id: Optional[str],
+    topic: Optional[str] = None,
+    role: Optional[str] = None
+) -> Optional[Filter]:
+    """Build the payload filter for a (child_id, topic, role) combination, reused across queries"""
+    filter_conditions = []
+    if child_id:
+        filter_conditions.append(
+            FieldCondition(key="child_id", match=MatchValue(value=child_id))
+        )
+    if topic:
+        filter_conditions.append(
+            FieldCondition(key="topic", match=MatchValue(value=topic))
+        )
+    if role:
+        filter_conditions.append(
+            FieldCondition(key="role", match=MatchValue(value=role))
+        )
+
+    return Filter(must=filter_conditions) if filter_conditions else None
+
 class MemoryService:
     """Service for managing conversation memory and semantic search"""
 
@@ -16,23 +55,42 @@ class MemoryService:
         self.embedding_model = None
         self.qdrant_client = None
         self.collection_name = settings.qdrant_collection_name
+        self.query_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.query_embedding_cache_size = settings.query_embedding_cache_size
         self._init_embedding_model()
 
     def _init_embedding_model(self):
         """Initialize sentence transformer model"""
         try:
+            use_onnx = settings.embedding_backend == "onnx"
+            if use_onnx and not ONNX_AVAILABLE:
+                logger.warning("ONNX embedding backend requested but onnxruntime is not installed, using torch")
+                use_onnx = False
+
             # Use a multilingual model for Spanish/English from config
-            self.embedding_model = SentenceTransformer(settings.embedding_model_name)
+            if use_onnx:
+                # Exported, graph-optimized and int8-quantized model for CPU inference
+                self.embedding_model = ONNXEmbedder(
+                    settings.embedding_onnx_dir,
+                    max_length=settings.embedding_max_length
+                )
+            elif torch.cuda.is_available():
+                # Half precision halves activation memory traffic on GPU
+                self.embedding_model = SentenceTransformer(
+                    settings.embedding_model_name, device="cuda"
+                ).half()
+            else:
+                self.embedding_model = SentenceTransformer(settings.embedding_model_name)
             logger.info(f"Embedding model {settings.embedding_model_name} initialized successfully")
 
-            # Initialize Qdrant collection if needed
-            self._init_qdrant_collection()
+            # The Qdrant collection is initialized lazily on first use,
+            # since the async client cannot be awaited from __init__
 
         except Exception as e:
             logger.error(f"Failed to initialize embedding model: {e}")
             self.embedding_model = None
 
-    def _init_qdrant_collection(self):
+    async def _init_qdrant_collection(self):
         """Initialize Qdrant collection for conversation embeddings"""
         try:
             qdrant = get_qdrant()
@@ -44,7 +102,7 @@ class MemoryService:
             self.qdrant_client = qdrant
 
             # Check if collection exists
-            collections = qdrant.get_collections().collections
+            collections = (await qdrant.get_collections()).collections
             collection_exists = any(
                 collection.name == self.collection_name
                 for collection in collections
@@ -52,17 +110,18 @@ class MemoryService:
 
             if not collection_exists:
                 # Create collection with optimal configuration
-                qdrant.create_collection(
+                await qdrant.create_collection(
                     collection_name=self.collection_name,
                     vectors_config={
                         "size": settings.embedding_dimension,
-                        "distance": "Cosine"
-                    }
+                        "distance": settings.qdrant_distance
+                    },
+                    quantization_config=get_qdrant_quantization_config()
                 )
                 logger.info(f"Created Qdrant collection: {self.collection_name}")
             else:
                 # Verify collection configuration
-                collection_info = qdrant.get_collection(self.collection_name)
+                collection_info = await qdrant.get_collection(self.collection_name)
                 if collection_info.config.params.vectors.size != settings.embedding_dimension:
                     logger.warning(
                         f"Collection vector dimension mismatch: "
@@ -70,9 +129,24 @@ class MemoryService:
                         f"got {collection_info.config.params.vectors.size}"
                     )
 
+            # Keyword indexes back filtering and the facet counts of the memory summary.
+            # Collections created before the indexes existed get them on startup too.
+            for field_name in QDRANT_KEYWORD_INDEX_FIELDS:
+                await qdrant.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema="keyword"
+                )
+
         except Exception as e:
             logger.error(f"Failed to initialize Qdrant collection: {e}")
 
+    async def _get_qdrant_client(self):
+        """Get the async Qdrant client, initializing the collection on first use"""
+        if not self.qdrant_client:
+            await self._init_qdrant_collection()
+        return self.qdrant_client
+
     async def store_conversation(
         self,
         conversation_id: str,
@@ -90,54 +164,65 @@ class MemoryService:
                 logger.debug("Semantic search disabled, skipping storage")
                 return False
 
-            if not self.qdrant_client:
+            if not await self._get_qdrant_client():
                 logger.warning("Qdrant client not available")
                 return False
 
-            # Create embeddings for both user and assistant messages
-            points = []
+            # Collect non-empty messages, cleaning emotion markup for embedding
+            indexed_messages = []
+            clean_texts = []
             for i, message in enumerate(messages):
                 text = message.get("text", "")
                 if text and len(text.strip()) > 0:
-                    # Clean text by removing emotion markup for embedding
-                    clean_text = self._clean_text_for_embedding(text)
-
-                    # Create embedding
-                    embedding = self.embedding_model.encode(
-                        clean_text,
-                        convert_to_tensor=True,
-                        normalize_embeddings=True
-                    ).tolist()
-
-                    # Create point with comprehensive metadata
-                    point = PointStruct(
-                        id=f"{conversation_id}_{message.get('role', 'unknown')}_{i}",
-                        vector=embedding,
-                        payload={
-                            "conversation_id": conversation_id,
-                            "child_id": child_id,
-                            "text": text,
-                            "clean_text": clean_text,
-                            "role": message.get("role"),
-                            "emotion": message.get("emotion"),
-                            "timestamp": message.get("timestamp"),
-                            "topic": metadata.get("topic") if metadata else None,
-                            "level": metadata.get("level") if metadata else None,
-                            "language": metadata.get("language") if metadata else None,
-                            "message_index": i
-                        }
-                    )
-                    points.append(point)
+                    indexed_messages.append((i, message, text))
+                    clean_texts.append(self._clean_text_for_embedding(text))
+
+            # Encode all messages in one batched call instead of one call per message
+            embeddings = []
+            if clean_texts:
+                embeddings = self.embedding_model.encode(
+                    clean_texts,
+                    batch_size=settings.embedding_batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ).astype(np.float32, copy=False)
+
+            # Messages without their own timestamp share one conversation-level timestamp
+            now = time.time()
+            topic = metadata.get("topic") if metadata else None
+            level = metadata.get("level") if metadata else None
+            language = metadata.get("language") if metadata else None
+
+            # Create points with comprehensive metadata
+            points = [
+                PointStruct(
+                    id=f"{conversation_id}_{message.get('role', 'unknown')}_{i}",
+                    vector=embedding.tolist(),
+                    payload={
+                        "conversation_id": conversation_id,
+                        "child_id": child_id,
+                        "text": text,
+                        "clean_text": clean_text,
+                        "role": message.get("role"),
+                        "emotion": message.get("emotion"),
+                        "timestamp": message["timestamp"] if message.get("timestamp") is not None else now,
+                        "topic": topic,
+                        "level": level,
+                        "language": language,
+                        "message_index": i
+                    }
+                )
+                for (i, message, text), clean_text, embedding in zip(indexed_messages, clean_texts, embeddings)
+            ]
 
-            # Store in Qdrant in batches for better performance
+            # Store the whole conversation in a single upsert round-trip,
+            # without blocking on the server-side write acknowledgement
             if points:
-                batch_size = settings.embedding_batch_size
-                for i in range(0, len(points), batch_size):
-                    batch = points[i:i + batch_size]
-                    self.qdrant_client.upsert(
-                        collection_name=self.collection_name,
-                        points=batch
-                    )
+                await self.qdrant_client.upsert(
+                    collection_name=self.collection_name,
+                    points=points,
+                    wait=False
+                )
 
                 logger.info(f"Stored {len(points)} messages for conversation {conversation_id}")
                 return True
@@ -150,11 +235,9 @@ class MemoryService:
 
     def _clean_text_for_embedding(self, text: str) -> str:
         """Clean text by removing emotion markup for better embedding quality"""
-        import re
-
         # Remove emotion markup (bold and underscore patterns)
-        clean_text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # Remove **bold**
-        clean_text = re.sub(r'__(.*?)__', r'\1', clean_text)  # Remove __underscore__
+        clean_text = _BOLD_MARKUP_RE.sub(r'\1', text)  # Remove **bold**
+        clean_text = _UNDERSCORE_MARKUP_RE.sub(r'\1', clean_text)  # Remove __underscore__
 
         # Remove extra whitespace
         clean_text = ' '.join(clean_text.split())
@@ -191,7 +274,7 @@ class MemoryService:
                 logger.debug("Semantic search disabled or model not available")
                 return []
 
-            if not self.qdrant_client:
+            if not await self._get_qdrant_client():
                 logger.warning("Qdrant client not available")
                 return []
 
@@ -199,41 +282,30 @@ class MemoryService:
             clean_query = self._clean_text_for_embedding(query)
 
             # Create query embedding with normalization
-            query_embedding = self.embedding_model.encode(
-                clean_query,
-                convert_to_tensor=True,
-                normalize_embeddings=True
-            ).tolist()
-
-            # Build filter conditions
-            filter_conditions = []
-            if child_id:
-                filter_conditions.append(
-                    FieldCondition(key="child_id", match=MatchValue(value=child_id))
-                )
-            if topic:
-                filter_conditions.append(
-                    FieldCondition(key="topic", match=MatchValue(value=topic))
-                )
-            if role:
-                filter_conditions.append(
-                    FieldCondition(key="role", match=MatchValue(value=role))
-                )
+            query_embedding = self._encode_query(clean_query)
 
-            search_filter = Filter(must=filter_conditions) if filter_conditions else None
+            search_filter = _build_filter(child_id, topic, role)
 
             # Set search limit from config if not provided
             search_limit = limit or settings.semantic_search_limit
 
+            # Rescore quantized candidates against the original vectors
+            search_params = None
+            if settings.qdrant_quantization:
+                search_params = SearchParams(
+                    quantization=QuantizationSearchParams(ignore=False, rescore=True)
+                )
+
             # Search with score threshold
-            results = self.qdrant_client.search(
+            results = await self.qdrant_client.search(
                 collection_name=self.collection_name,
                 query_vector=query_embedding,
                 query_filter=search_filter,
                 limit=search_limit * 2,  # Get more results to filter by score
                 with_payload=True,
                 with_score=True,
-                score_threshold=min_score
+                score_threshold=min_score,
+                search_params=search_params
             )
 
             # Format and filter results
@@ -276,6 +348,25 @@ class MemoryService:
             logger.error(f"Error searching similar conversations: {e}")
             return []
 
+    def _encode_query(self, clean_query: str) -> np.ndarray:
+        """Embed a search query, reusing the embedding of recently seen queries"""
+        query_embedding = self.query_embedding_cache.get(clean_query)
+        if query_embedding is not None:
+            self.query_embedding_cache.move_to_end(clean_query)
+            return query_embedding
+
+        query_embedding = self.embedding_model.encode(
+            clean_query,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+
+        self.query_embedding_cache[clean_query] = query_embedding
+        if len(self.query_embedding_cache) > self.query_embedding_cache_size:
+            self.query_embedding_cache.popitem(last=False)
+
+        return query_embedding
+
     async def get_conversation_context(
         self,
         child_id: str,
@@ -319,15 +410,19 @@ class MemoryService:
             all_results = []
             seen_messages = set()
 
-            for search_query in contextual_queries[:5]:  # Limit to prevent too many searches
-                results = await self.search_similar_conversations(
+            # Run the independent searches concurrently; results keep query order
+            results_per_query = await asyncio.gather(*[
+                self.search_similar_conversations(
                     query=search_query,
                     child_id=child_id,
                     topic=topic,
                     limit=context_limit // 2,  # Split limit across queries
                     min_score=0.2  # Lower threshold for broader context
                 )
+                for search_query in contextual_queries[:5]  # Limit to prevent too many searches
+            ])
 
+            for results in results_per_query:
                 for result in results:
                     message_key = (
                         result.get("conversation_id"),
@@ -363,60 +458,43 @@ class MemoryService:
             if not settings.enable_semantic_search:
                 return {"status": "disabled"}
 
-            if not self.qdrant_client:
+            if not await self._get_qdrant_client():
                 return {"status": "unavailable"}
 
-            # Build filter
-            filter_conditions = [
-                FieldCondition(key="child_id", match=MatchValue(value=child_id))
-            ]
-            if topic:
-                filter_conditions.append(
-                    FieldCondition(key="topic", match=MatchValue(value=topic))
-                )
-
-            search_filter = Filter(must=filter_conditions)
+            search_filter = _build_filter(child_id, topic)
 
-            # Get count and sample results
-            results = self.qdrant_client.scroll(
+            # Count matching messages in the engine instead of scrolling their payloads
+            total_messages = (await self.qdrant_client.count(
                 collection_name=self.collection_name,
-                scroll_filter=search_filter,
-                limit=100,
-                with_payload=True
-            )[0]
-
-            # Analyze results
-            total_messages = len(results)
-            user_messages = sum(1 for r in results if r.payload.get("role") == "user")
-            assistant_messages = sum(1 for r in results if r.payload.get("role") == "assistant")
-
-            # Extract common themes (simplified)
-            topics_count = {}
-            emotions_count = {}
-            recent_conversations = set()
-
-            for result in results:
-                # Count topics
-                result_topic = result.payload.get("topic")
-                if result_topic:
-                    topics_count[result_topic] = topics_count.get(result_topic, 0) + 1
-
-                # Count emotions
-                emotion = result.payload.get("emotion")
-                if emotion:
-                    emotions_count[emotion] = emotions_count.get(emotion, 0) + 1
+                count_filter=search_filter,
+                exact=True
+            )).count
+
+            # A facet never returns more distinct values than there are messages
+            facet_limit = max(total_messages, 1)
+            roles, topics, emotions, conversations = await asyncio.gather(*(
+                self.qdrant_client.facet(
+                    collection_name=self.collection_name,
+                    key=key,
+                    facet_filter=search_filter,
+                    limit=facet_limit,
+                    exact=True
+                )
+                for key in ("role", "topic", "emotion", "conversation_id")
+            ))
 
-                # Track recent conversations
-                conv_id = result.payload.get("conversation_id")
-                if conv_id:
-                    recent_conversations.add(conv_id)
+            roles_count = {hit.value: hit.count for hit in roles.hits}
+            user_messages = roles_count.get("user", 0)
+            assistant_messages = roles_count.get("assistant", 0)
+            topics_count = {hit.value: hit.count for hit in topics.hits}
+            emotions_count = {hit.value: hit.count for hit in emotions.hits}
 
             return {
                 "status": "available",
                 "total_messages": total_messages,
                 "user_messages": user_messages,
                 "assistant_messages": assistant_messages,
-                "unique_conversations": len(recent_conversations),
+                "unique_conversations": len(conversations.hits),
                 "topics_distribution": topics_count,
                 "emotions_distribution": emotions_count,
                 "most_discussed_topics": sorted(
@@ -517,7 +595,7 @@ class MemoryService:
     async def delete_conversation_memory(self, conversation_id: str) -> bool:
         """Delete conversation from vector memory"""
         try:
-            if not self.qdrant_client:
+            if not await self._get_qdrant_client():
                 return False
 
             # Delete points for this conversation
@@ -525,7 +603,7 @@ class MemoryService:
                 must=[FieldCondition(key="conversation_id", match=MatchValue(value=conversation_id))]
             )
 
-            self.qdrant_client.delete(
+            await self.qdrant_client.delete(
                 collection_name=self.collection_name,
                 points_selector=filter_condition
             )
@@ -540,11 +618,11 @@ class MemoryService:
     async def get_memory_status(self) -> Dict[str, Any]:
         """Get memory service status"""
         try:
-            if not self.qdrant_client:
+            if not await self._get_qdrant_client():
                 return {"status": "unavailable", "reason": "Qdrant client not available"}
 
             # Get collection info
-            collection_info = self.qdrant_client.get_collection(self.collection_name)
+            collection_info = await self.qdrant_client.get_collection(self.collection_name)
 
             return {
                 "status": "available",
@@ -0,0 +1,85 @@
+import logging
+import os
+from typing import List, Union
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    logging.warning("onnxruntime not available. Please install with: pip install onnxruntime")
+
+logger = logging.getLogger(__name__)
+
+# File written by scripts/export_embedding_onnx.py
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over the non-padding positions of each sentence"""
+    mask = attention_mask[..., np.newaxis].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+class ONNXEmbedder:
+    """Sentence embedder running an exported transformer with ONNX Runtime
+
+    Implements the subset of ``SentenceTransformer.encode`` used by
+    MemoryService, so it can be swapped in as the embedding model on CPU.
+    """
+
+    def __init__(self, model_dir: str, max_length: int = 512):
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        logger.info(f"ONNX embedding model loaded from {model_dir}")
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Embed one sentence or a list of sentences as float32 numpy arrays"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encoded = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            inputs = {
+                name: encoded[name].astype(np.int64)
+                for name in self.input_names
+                if name in encoded
+            }
+            token_embeddings = self.session.run(None, inputs)[0]
+            batches.append(mean_pool(token_embeddings, encoded["attention_mask"]))
+
+        embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
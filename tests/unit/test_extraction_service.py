@@ -1,4 +1,6 @@
+import uuid
 import pytest
+from collections import defaultdict
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 
@@ -8,16 +10,38 @@ from services.api.models.extraction_models import (
     EntityType, RelationshipType, ValidationReport
 )
 from services.api.models.schemas import Message
+from pydantic import ValidationError
+
+
+def _group_by_predicate(triples):
+    """Index triples by predicate once instead of rescanning them per assertion"""
+    triples_by_predicate = defaultdict(list)
+    for triple in triples:
+        triples_by_predicate[triple.predicate].append(triple)
+    return triples_by_predicate
 
 
 class TestExtractionService:
     """Test suite for ExtractionService"""
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def extraction_service(self):
-        """Create extraction service instance"""
+        """Create extraction service instance shared across the module"""
         return ExtractionService()
 
+    @pytest.fixture
+    def mock_llm(self, extraction_service, monkeypatch):
+        """Replace the LLM call in place with an AsyncMock, restored on teardown"""
+        mock = AsyncMock()
+        monkeypatch.setattr(extraction_service.llm_service, "generate_response", mock)
+        return mock
+
+    @pytest.fixture(autouse=True)
+    def reset_active_jobs(self, extraction_service):
+        """Clear jobs left behind by previous tests on the shared service"""
+        yield
+        extraction_service.active_jobs.clear()
+
     @pytest.fixture
     def sample_messages(self):
         """Create sample conversation messages"""
@@ -96,113 +120,155 @@ class TestExtractionService:
 
     @pytest.mark.asyncio
     async def test_extract_entities_from_conversation_success(
-        self, extraction_service, sample_messages, sample_entities, sample_relationships
+        self, extraction_service, sample_messages, sample_entities, sample_relationships, mock_llm
     ):
         """Test successful entity extraction from conversation"""
         # Mock LLM service responses
-        with patch.object(extraction_service.llm_service, 'generate_response') as mock_llm:
-            # Mock entity extraction response
-            entities_response = """
-            {
-                "entities": [
-                    {
-                        "text": "parque",
-                        "type": "place",
-                        "confidence": 0.95,
-                        "start_pos": 20,
-                        "end_pos": 25,
-                        "normalized_form": "parque"
-                    },
-                    {
-                        "text": "amigos",
-                        "type": "person",
-                        "confidence": 0.90,
-                        "start_pos": 30,
-                        "end_pos": 36,
-                        "normalized_form": "amigos"
-                    }
-                ]
-            }
-            """
-
-            # Mock relationship extraction response
-            relationships_response = """
-            {
-                "relationships": [
-                    {
-                        "subject": "niño",
-                        "predicate": "likes",
-                        "object": "parque",
-                        "confidence": 0.92,
-                        "source_text": "Me gusta jugar en el parque",
-                        "context": "niño le gusta el parque"
-                    }
-                ]
-            }
-            """
+        # Mock entity extraction response
+        entities_response = """
+        {
+            "entities": [
+                {
+                    "text": "parque",
+                    "type": "place",
+                    "confidence": 0.95,
+                    "start_pos": 20,
+                    "end_pos": 25,
+                    "normalized_form": "parque"
+                },
+                {
+                    "text": "amigos",
+                    "type": "person",
+                    "confidence": 0.90,
+                    "start_pos": 30,
+                    "end_pos": 36,
+                    "normalized_form": "amigos"
+                }
+            ]
+        }
+        """
+
+        # Mock relationship extraction response
+        relationships_response = """
+        {
+            "relationships": [
+                {
+                    "subject": "niño",
+                    "predicate": "likes",
+                    "object": "parque",
+                    "confidence": 0.92,
+                    "source_text": "Me gusta jugar en el parque",
+                    "context": "niño le gusta el parque"
+                }
+            ]
+        }
+        """
+
+        mock_llm.side_effect = [entities_response, relationships_response]
+
+        # Execute extraction
+        result = await extraction_service.extract_entities_from_conversation(
+            conversation_id="conv_123",
+            child_id="child_456",
+            conversation_messages=sample_messages
+        )
 
-            mock_llm.side_effect = [entities_response, relationships_response]
+        # Assertions
+        assert result.conversation_id == "conv_123"
+        assert result.child_id == "child_456"
+        assert len(result.entities) == 2
+        assert len(result.relationships) == 1
+        assert result.entities[0].text == "parque"
+        assert result.entities[0].type == EntityType.PLACE
+        assert result.relationships[0].predicate == RelationshipType.LIKES
+        assert result.model_used is not None
+        assert result.processing_time_ms > 0
 
-            # Execute extraction
-            result = await extraction_service.extract_entities_from_conversation(
+    @pytest.mark.asyncio
+    async def test_extract_entities_from_conversation_short_text_skips_llm(self, extraction_service, mock_llm):
+        """Test trivially short conversations return an empty result without LLM calls"""
+        messages = [
+            Message(
                 conversation_id="conv_123",
-                child_id="child_456",
-                conversation_messages=sample_messages
+                role="user",
+                text="hola",
+                timestamp=datetime.now()
             )
+        ]
+
+        result = await extraction_service.extract_entities_from_conversation(
+            conversation_id="conv_123",
+            child_id="child_456",
+            conversation_messages=messages
+        )
 
-            # Assertions
-            assert result.conversation_id == "conv_123"
-            assert result.child_id == "child_456"
-            assert len(result.entities) == 2
-            assert len(result.relationships) == 1
-            assert result.entities[0].text == "parque"
-            assert result.entities[0].type == EntityType.PLACE
-            assert result.relationships[0].predicate == RelationshipType.LIKES
-            assert result.model_used is not None
-            assert result.processing_time_ms > 0
+        mock_llm.assert_not_called()
+        assert result.entities == []
+        assert result.relationships == []
+        assert result.model_used == "skipped"
 
     @pytest.mark.asyncio
-    async def test_extract_entities_llm_invalid_json(self, extraction_service):
+    async def test_extract_entities_llm_invalid_json(self, extraction_service, mock_llm):
         """Test handling of invalid JSON response from LLM"""
-        with patch.object(extraction_service.llm_service, 'generate_response') as mock_llm:
-            # Return invalid JSON
-            mock_llm.return_value = "This is not valid JSON"
-
-            result = await extraction_service._extract_entities_llm(
-                text="test conversation",
-                child_id="child_123",
-                conversation_id="conv_456"
-            )
+        # Return invalid JSON
+        mock_llm.return_value = "This is not valid JSON"
 
-            assert result == []
+        result = await extraction_service._extract_entities_llm(
+            text="test conversation",
+            child_id="child_123",
+            conversation_id="conv_456"
+        )
+
+        assert result == []
 
     @pytest.mark.asyncio
-    async def test_extract_entities_llm_low_confidence(self, extraction_service):
+    async def test_extract_entities_llm_low_confidence(self, extraction_service, mock_llm):
         """Test filtering of low-confidence entities"""
-        with patch.object(extraction_service.llm_service, 'generate_response') as mock_llm:
-            low_confidence_response = """
-            {
-                "entities": [
-                    {
-                        "text": "entidad_baja_confianza",
-                        "type": "concept",
-                        "confidence": 0.5,
-                        "start_pos": 0,
-                        "end_pos": 20,
-                        "normalized_form": "entidad_baja_confianza"
-                    }
-                ]
-            }
-            """
-            mock_llm.return_value = low_confidence_response
+        low_confidence_response = """
+        {
+            "entities": [
+                {
+                    "text": "entidad_baja_confianza",
+                    "type": "concept",
+                    "confidence": 0.5,
+                    "start_pos": 0,
+                    "end_pos": 20,
+                    "normalized_form": "entidad_baja_confianza"
+                }
+            ]
+        }
+        """
+        mock_llm.return_value = low_confidence_response
+
+        result = await extraction_service._extract_entities_llm(
+            text="test conversation",
+            child_id="child_123",
+            conversation_id="conv_456"
+        )
 
-            result = await extraction_service._extract_entities_llm(
-                text="test conversation",
-                child_id="child_123",
-                conversation_id="conv_456"
-            )
+        assert len(result) == 0  # Should be filtered out due to low confidence
+
+    @pytest.mark.asyncio
+    async def test_extract_entities_llm_keeps_valid_entities(self, extraction_service, mock_llm):
+        """Test an invalid entity does not discard the valid ones"""
+        mock_llm.return_value = """
+        {
+            "entities": [
+                {"text": "parque", "type": "place", "confidence": 0.9,
+                 "start_pos": 0, "end_pos": 6},
+                {"text": "nube", "type": "unknown_type", "confidence": 0.9,
+                 "start_pos": 7, "end_pos": 11}
+            ]
+        }
+        """
+
+        result = await extraction_service._extract_entities_llm(
+            text="parque nube",
+            child_id="child_123",
+            conversation_id="conv_456"
+        )
 
-            assert len(result) == 0  # Should be filtered out due to low confidence
+        assert [entity.text for entity in result] == ["parque"]
 
     def test_convert_to_rdf_triples(self, extraction_service, sample_entities, sample_relationships):
         """Test conversion of entities and relationships to RDF triples"""
@@ -215,18 +281,33 @@ class TestExtractionService:
 
         # Should have child entity, conversation link, entity types, and relationships
         assert len(triples) > 5
+        triples_by_predicate = _group_by_predicate(triples)
 
         # Check child entity creation
-        child_triples = [t for t in triples if "child_123" in t.subject]
-        assert len(child_triples) > 0
+        type_objects = {t.object for t in triples_by_predicate["rdf:type"]}
+        assert "emo:Child" in type_objects
 
         # Check entity type mapping
-        place_triples = [t for t in triples if t.object == "emo:Place"]
-        assert len(place_triples) > 0
+        assert "emo:Place" in type_objects
 
         # Check relationship mapping
-        likes_triples = [t for t in triples if t.predicate == "emo:likes"]
-        assert len(likes_triples) > 0
+        assert len(triples_by_predicate["emo:likes"]) > 0
+
+    def test_extraction_value_models_are_frozen(self, sample_entities, sample_relationships):
+        """Test extracted values are immutable slotted models"""
+        from services.api.models.extraction_models import RDFTriple
+
+        triple = RDFTriple(subject="https://emorobcare.org/kg/child/1", predicate="rdf:type", object="emo:Child")
+
+        for model, field in (
+            (sample_entities[0], "text"),
+            (sample_relationships[0], "object"),
+            (triple, "object")
+        ):
+            assert hasattr(type(model), "__slots__")
+            with pytest.raises(ValidationError):
+                setattr(model, field, "changed")
+        assert hash(triple) == hash(triple.model_copy())
 
     def test_find_entity_uri(self, extraction_service, sample_entities):
         """Test finding entity URI by text"""
@@ -324,9 +405,9 @@ class TestExtractionService:
         )
 
         assert job_id is not None
-        assert job_id in extraction_service.active_jobs
+        assert uuid.UUID(job_id) in extraction_service.active_jobs
 
-        job = extraction_service.active_jobs[job_id]
+        job = extraction_service.active_jobs[uuid.UUID(job_id)]
         assert job.conversation_id == "conv_123"
         assert job.child_id == "child_456"
         assert job.status == "pending"
@@ -348,6 +429,29 @@ class TestExtractionService:
         job = extraction_service.get_job_status("non_existent")
         assert job is None
 
+    def test_create_extraction_job_evicts_finished_jobs(self, extraction_service, monkeypatch):
+        """Test finished jobs are evicted LRU-first once over the job cap"""
+        monkeypatch.setattr(extraction_service, "max_jobs", 2)
+
+        first_id = extraction_service.create_extraction_job("conv_1", "child_1")
+        second_id = extraction_service.create_extraction_job("conv_2", "child_1")
+        extraction_service.get_job_status(first_id).status = "completed"
+        extraction_service.get_job_status(second_id).status = "completed"
+
+        # Touch the first job so the second becomes least recently used
+        extraction_service.get_job_status(first_id)
+        third_id = extraction_service.create_extraction_job("conv_3", "child_1")
+
+        assert extraction_service.get_job_status(second_id) is None
+        assert extraction_service.get_job_status(first_id) is not None
+        assert extraction_service.get_job_status(third_id) is not None
+
+        # Only finished jobs are evicted; pending ones are kept
+        fourth_id = extraction_service.create_extraction_job("conv_4", "child_1")
+        assert extraction_service.get_job_status(first_id) is None
+        assert extraction_service.get_job_status(third_id) is not None
+        assert extraction_service.get_job_status(fourth_id) is not None
+
     @pytest.mark.asyncio
     async def test_process_extraction_job_success(
         self, extraction_service, sample_messages, sample_entities, sample_relationships
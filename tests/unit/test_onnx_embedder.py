@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from services.api.services.onnx_embedder import ONNXEmbedder, mean_pool
+
+
+TOKEN_EMBEDDINGS = np.array([
+    [[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]],  # Last token is padding
+    [[0.0, 2.0], [0.0, 4.0], [0.0, 6.0]],
+], dtype=np.float32)
+ATTENTION_MASK = np.array([[1, 1, 0], [1, 1, 1]])
+# Row of TOKEN_EMBEDDINGS / ATTENTION_MASK each sentence tokenizes to
+SENTENCE_ROWS = {"hola": 0, "adiós": 1}
+
+
+@pytest.fixture
+def onnx_embedder():
+    """Create an ONNX embedder with a mocked tokenizer and inference session"""
+    def tokenize(sentences, **kwargs):
+        # Input ids carry the sentence row so the session returns its hidden states
+        rows = np.array([SENTENCE_ROWS[sentence] for sentence in sentences])
+        return {
+            "input_ids": np.repeat(rows[:, np.newaxis], 3, axis=1).astype(np.int32),
+            "attention_mask": ATTENTION_MASK[rows],
+        }
+
+    tokenizer = Mock(side_effect=tokenize)
+    session = Mock()
+    session.get_inputs.return_value = [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+    session.run.side_effect = lambda outputs, inputs: [TOKEN_EMBEDDINGS[inputs["input_ids"][:, 0]]]
+
+    with patch('services.api.services.onnx_embedder.AutoTokenizer', create=True) as mock_tokenizer_class, \
+         patch('services.api.services.onnx_embedder.ort', create=True) as mock_ort:
+        mock_tokenizer_class.from_pretrained.return_value = tokenizer
+        mock_ort.InferenceSession.return_value = session
+        return ONNXEmbedder("models/embedding_onnx")
+
+
+class TestONNXEmbedder:
+    """Test cases for the ONNX Runtime embedding backend"""
+
+    def test_mean_pool_ignores_padding(self):
+        """Test mean pooling only averages unmasked tokens"""
+        pooled = mean_pool(TOKEN_EMBEDDINGS, ATTENTION_MASK)
+
+        np.testing.assert_allclose(pooled, [[2.0, 0.0], [0.0, 4.0]])
+
+    def test_encode_batch_normalized(self, onnx_embedder):
+        """Test batch encoding returns one L2-normalized row per sentence"""
+        embeddings = onnx_embedder.encode(["hola", "adiós"], normalize_embeddings=True)
+
+        assert embeddings.shape == (2, 2)
+        assert embeddings.dtype == np.float32
+        np.testing.assert_allclose(embeddings, [[1.0, 0.0], [0.0, 1.0]])
+
+    def test_encode_single_sentence(self, onnx_embedder):
+        """Test a single string is embedded as a flat vector"""
+        embedding = onnx_embedder.encode("hola")
+
+        assert embedding.shape == (2,)
+        assert embedding.tolist() == [2.0, 0.0]
+
+    def test_encode_splits_batches(self, onnx_embedder):
+        """Test split batches pool over unpadded tokens and L2-normalize each row"""
+        pooled = onnx_embedder.encode(["hola", "adiós"], batch_size=1)
+        embeddings = onnx_embedder.encode(["hola", "adiós"], batch_size=1, normalize_embeddings=True)
+
+        assert onnx_embedder.session.run.call_count == 4
+        # The padded [100, 100] token of "hola" does not shift its mean
+        np.testing.assert_allclose(pooled, [[2.0, 0.0], [0.0, 4.0]])
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), [1.0, 1.0], rtol=1e-6)
+        np.testing.assert_allclose(embeddings, [[1.0, 0.0], [0.0, 1.0]])
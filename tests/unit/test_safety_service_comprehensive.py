@@ -1,11 +1,13 @@
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
+from types import SimpleNamespace
 import asyncio
 from datetime import datetime
 import re
 
-from services.api.services.safety_service import SafetyService
+from services.api.services.safety_service import SafetyService, SafetyViolationType, _RuleScanner, _TopicMatcher
 from services.api.models.schemas import SafetyCheckResult, SafetyViolation
+from services.api.core.config import settings
 
 
 class TestSafetyServiceComprehensive:
@@ -312,16 +314,19 @@ class TestSafetyServiceComprehensive:
         whitespace_content = "   \n\t   "
 
         # Act
-        result = await safety_service.check_content_safety(
-            content=whitespace_content,
-            child_profile=mock_child_profile,
-            context=mock_context,
-            language="es"
-        )
+        with patch.object(safety_service, '_check_inappropriate_content') as mock_check:
+            result = await safety_service.check_content_safety(
+                content=whitespace_content,
+                child_profile=mock_child_profile,
+                context=mock_context,
+                language="es"
+            )
 
         # Assert
         assert result.is_safe is True
         assert result.confidence == 1.0
+        assert result.violations == []
+        mock_check.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_check_content_safety_edge_case_very_young_child(self, safety_service, mock_context):
@@ -430,6 +435,119 @@ class TestSafetyServiceComprehensive:
         assert isinstance(result, SafetyCheckResult)
         # Should handle potential injection safely
 
+    def test_check_inappropriate_content_single_pass_per_occurrence(self, safety_service, mock_child_profile):
+        """Test the combined rule pattern reports every occurrence once, in content order"""
+        # "asco" appears in two rule groups but is only reported once per occurrence
+        violations = safety_service._check_inappropriate_content(
+            "Qué ASCO, me da miedo y asco", "es", mock_child_profile
+        )
+
+        assert [v.detected_content for v in violations] == ["ASCO", "miedo", "asco"]
+
+    @pytest.mark.asyncio
+    async def test_check_content_safety_reuses_cached_result(self, safety_service, mock_child_profile, mock_context):
+        """Test repeated content for an equivalent profile skips the scan but is still logged"""
+        content = "Esto es terrible"
+
+        with patch.object(safety_service, '_check_inappropriate_content', wraps=safety_service._check_inappropriate_content) as mock_check:
+            first = await safety_service.check_content_safety(content, mock_child_profile, mock_context, "es")
+            second = await safety_service.check_content_safety(content, mock_child_profile, mock_context, "es")
+            await safety_service.check_content_safety(
+                content, {**mock_child_profile, "sensitivity": "high"}, mock_context, "es"
+            )
+
+        assert mock_check.call_count == 2
+        assert second.violations == first.violations
+        assert second.violations is not first.violations
+        with pytest.raises(ValueError):
+            second.violations[0].severity = "low"
+        assert len(safety_service.safety_log) == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("content, offloaded", [
+        ("Esto es terrible", False),
+        ("palabra segura " * 200, True),
+    ], ids=["short_inline", "long_thread"])
+    async def test_check_content_safety_offloads_long_content(self, safety_service, mock_child_profile, mock_context, content, offloaded):
+        """Test only long content is scanned in a worker thread"""
+        with patch('services.api.services.safety_service.asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+            result = await safety_service.check_content_safety(content, mock_child_profile, mock_context, "es")
+
+        assert isinstance(result, SafetyCheckResult)
+        assert mock_to_thread.called is offloaded
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("short_circuit", [True, False], ids=["short_circuit", "full_scan"])
+    async def test_check_content_safety_short_circuit_on_high_severity(
+        self, safety_service, mock_child_profile, mock_context, short_circuit
+    ):
+        """Test a high-severity violation only skips the report-only checks, never the filtering"""
+        with patch.object(settings, 'safety_short_circuit', short_circuit), \
+             patch.object(safety_service, '_check_language_complexity', return_value=[]) as mock_complexity, \
+             patch.object(safety_service, '_check_emotional_appropriateness', return_value=[]) as mock_emotional:
+            result = await safety_service.check_content_safety(
+                "Mi email es ana@example.com, qué terrible y estúpido", mock_child_profile, mock_context, "es"
+            )
+
+        assert result.is_safe is False
+        assert [v.type for v in result.violations] == [
+            str(SafetyViolationType.PERSONAL_INFO),
+            str(SafetyViolationType.INAPPROPRIATE_CONTENT),
+            str(SafetyViolationType.INAPPROPRIATE_CONTENT)
+        ]
+        assert {v.detected_content for v in result.violations[1:]} == {"terrible", "estúpido"}
+        assert "[información personal]" in result.processed_content
+        assert "estúpido" not in result.processed_content
+        assert mock_complexity.called is not short_circuit
+        assert mock_emotional.called is not short_circuit
+
+    def test_check_personal_info_skips_rules_without_required_literal(self, safety_service):
+        """Test email rules only run when "@" occurs and number rules only when a digit does"""
+        email_rule, number_rule = Mock(), Mock()
+        email_rule.finditer.return_value = []
+        number_rule.finditer.return_value = []
+        safety_service.personal_info_rules = [(email_rule, True, False), (number_rule, False, True)]
+
+        safety_service._check_personal_info("Me gusta jugar en el parque")
+        email_rule.finditer.assert_not_called()
+        number_rule.finditer.assert_not_called()
+
+        safety_service._check_personal_info("Escribe a ana@example.com")
+        email_rule.finditer.assert_called_once()
+        number_rule.finditer.assert_not_called()
+
+    def test_rule_scanner_hyperscan_backend(self):
+        """Test Hyperscan hits are deduplicated by span and decoded in content order"""
+        content = "Qué asco, me da miedo"
+        data = content.encode("utf-8")
+        miedo = data.index(b"miedo")
+        asco = data.index(b"asco")
+
+        database = Mock()
+        # Two rules report the same "asco" span; hits arrive out of order
+        database.scan.side_effect = lambda data, match_event_handler: [
+            match_event_handler(rule_id, start, end, 0, None)
+            for rule_id, start, end in [(2, miedo, miedo + 5), (2, asco, asco + 4), (3, asco, asco + 4)]
+        ]
+        fake_hyperscan = SimpleNamespace(
+            Database=Mock(return_value=database),
+            HS_FLAG_CASELESS=1, HS_FLAG_UTF8=2, HS_FLAG_UCP=4, HS_FLAG_SOM_LEFTMOST=8
+        )
+
+        with patch('services.api.services.safety_service.HYPERSCAN_AVAILABLE', True), \
+             patch('services.api.services.safety_service.hyperscan', fake_hyperscan, create=True):
+            scanner = _RuleScanner([r"\b(miedo)\b", r"\b(asco)\b"])
+
+        assert scanner.find(content) == ["asco", "miedo"]
+        assert database.compile.call_args.kwargs["ids"] == [0, 1]
+
+    def test_topic_matcher_reports_topics_in_list_order(self):
+        """Test topic matching returns each found topic once, in list order"""
+        matcher = _TopicMatcher(["monstruos", "miedo oscuro", "fantasmas"])
+
+        assert matcher.find("fantasmas, monstruos y más fantasmas") == ["monstruos", "fantasmas"]
+        assert matcher.find("un día tranquilo") == []
+
     def test_get_service_status_edge_case_complete_status(self, safety_service):
         """Test service status includes all expected attributes"""
         # Act
@@ -450,6 +568,17 @@ class TestSafetyServiceComprehensive:
         assert status["detection_rules_count"] > 0
         assert status["blocked_patterns_count"] > 0
 
+    @pytest.mark.asyncio
+    async def test_get_service_status_reports_live_check_count(self, safety_service, mock_child_profile, mock_context):
+        """Test the precomputed status still reflects checks performed since startup"""
+        assert safety_service.get_service_status()["safety_checks_performed"] == 0
+
+        await safety_service.check_content_safety("Me gusta jugar", mock_child_profile, mock_context, "es")
+
+        status = safety_service.get_service_status()
+        assert status["safety_checks_performed"] == 1
+        assert status["detection_rules_count"] == safety_service.status_snapshot["detection_rules_count"]
+
     @pytest.mark.asyncio
     async def test_concurrent_safety_checks(self, safety_service, mock_child_profile, mock_context):
         """Test concurrent safety checks"""
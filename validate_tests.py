@@ -4,110 +4,140 @@ Test validation script for EmoRobCare
 Validates test files for common issues without executing them
 """
 import ast
+import hashlib
 import os
+import pickle
 import sys
-from pathlib import Path
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
+
+# Per-file results from previous runs, reused while a file's mtime and size are unchanged
+CACHE_DIR = '.validator_cache'
+CACHE_FILE = os.path.join(CACHE_DIR, 'results.pickle')
+
+def _validator_fingerprint() -> str:
+    """Hash of this script, so edits to the validation rules invalidate cached results"""
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def _iter_test_files(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path, stat) for every test_*.py file below root"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.startswith('test_') and entry.name.endswith('.py'):
+                    yield entry.path, entry.stat()
+
+class _Collector(ast.NodeVisitor):
+    """Collects the validator findings for one file, dispatching on node type"""
+
+    def __init__(self, is_problematic_import: Callable[[str], bool]):
+        self.is_problematic_import = is_problematic_import
+        self.import_issues = []
+        self.structure_issues = []
+        self.has_test_class = False
+        self.has_test_function = False
+        self.has_mock_import = False
+        self.mock_usage = False
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            if self.is_problematic_import(alias.name):
+                self.import_issues.append(f"Problematic import: {alias.name}")
+            if 'mock' in alias.name.lower():
+                self.has_mock_import = True
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            if self.is_problematic_import(node.module):
+                self.import_issues.append(f"Problematic import: {node.module}")
+            if 'mock' in node.module.lower():
+                self.has_mock_import = True
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if node.name.startswith('Test'):
+            self.has_test_class = True
+            # Check if test methods exist
+            test_methods = [n for n in node.body if isinstance(n, ast.FunctionDef) and n.name.startswith('test_')]
+            if not test_methods:
+                self.structure_issues.append(f"Test class {node.name} has no test methods")
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        if node.name.startswith('test_'):
+            self.has_test_function = True
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        if isinstance(node.func, ast.Attribute):
+            if node.func.attr == 'Mock' or node.func.attr == 'AsyncMock':
+                self.mock_usage = True
+        self.generic_visit(node)
 
 class TestValidator:
+    # Heavy ML dependencies; str.startswith checks all prefixes in one call
+    _PROBLEM_PREFIXES = (
+        'vllm',
+        'torch',
+        'transformers',
+        'whisper',
+        'faster_whisper',
+    )
+
     def __init__(self):
         self.issues = []
         self.test_files = []
 
-    def validate_imports(self, file_path: str, tree: ast.AST) -> List[str]:
-        """Check if imports are valid"""
-        issues = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    module = alias.name
-                    if self.is_problematic_import(module):
-                        issues.append(f"Problematic import: {module}")
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    if self.is_problematic_import(node.module):
-                        issues.append(f"Problematic import: {node.module}")
-        return issues
-
     def is_problematic_import(self, module: str) -> bool:
         """Check if module import might cause issues"""
-        problematic_modules = [
-            'vllm',  # Heavy ML dependency
-            'torch',  # Heavy ML dependency
-            'transformers',  # Heavy ML dependency
-            'whisper',  # Heavy ML dependency
-            'faster_whisper',  # Heavy ML dependency
-        ]
-        return any(module.startswith(problem) for problem in problematic_modules)
-
-    def validate_test_structure(self, file_path: str, tree: ast.AST) -> List[str]:
-        """Check test file structure"""
-        issues = []
-        has_test_class = False
-        has_test_function = False
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                if node.name.startswith('Test'):
-                    has_test_class = True
-                    # Check if test methods exist
-                    test_methods = [n for n in node.body if isinstance(n, ast.FunctionDef) and n.name.startswith('test_')]
-                    if not test_methods:
-                        issues.append(f"Test class {node.name} has no test methods")
-
-            elif isinstance(node, ast.FunctionDef):
-                if node.name.startswith('test_'):
-                    has_test_function = True
-
-        if not has_test_class and not has_test_function:
-            issues.append("No test functions or test classes found")
-
-        return issues
-
-    def validate_mock_usage(self, file_path: str, tree: ast.AST) -> List[str]:
-        """Check if mocks are used correctly"""
-        issues = []
-        has_mock_import = False
-        mock_usage = False
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    if 'mock' in alias.name.lower():
-                        has_mock_import = True
-            elif isinstance(node, ast.ImportFrom):
-                if node.module and 'mock' in node.module.lower():
-                    has_mock_import = True
-            elif isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Attribute):
-                    if node.func.attr == 'Mock' or node.func.attr == 'AsyncMock':
-                        mock_usage = True
-
-        if has_mock_import and not mock_usage:
-            issues.append("Mock imported but not used")
-
-        return issues
-
-    def validate_file(self, file_path: str) -> Dict[str, Any]:
-        """Validate a single test file"""
+        return module.startswith(self._PROBLEM_PREFIXES)
+
+    def _walk_once(self, tree: ast.AST) -> Tuple[List[str], List[str], List[str]]:
+        """Run the import, structure and mock checks in a single pass over the AST
+
+        Returns (import_issues, structure_issues, mock_issues).
+        """
+        collector = _Collector(self.is_problematic_import)
+        collector.visit(tree)
+
+        structure_issues = collector.structure_issues
+        if not collector.has_test_class and not collector.has_test_function:
+            structure_issues.append("No test functions or test classes found")
+
+        mock_issues = []
+        if collector.has_mock_import and not collector.mock_usage:
+            mock_issues.append("Mock imported but not used")
+
+        return collector.import_issues, structure_issues, mock_issues
+
+    def validate_file(self, file_path: str, st: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        """Validate a single test file, reusing its stat result when the caller has one"""
         result = {
             'file': file_path,
             'issues': [],
-            'size': os.path.getsize(file_path),
+            'size': st.st_size if st is not None else os.path.getsize(file_path),
             'lines': 0
         }
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                result['lines'] = len(content.splitlines())
+            # ast.parse decodes the source itself, so the file is read as raw bytes
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            result['lines'] = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
 
-            tree = ast.parse(content)
+            tree = ast.parse(data, filename=file_path)
 
             # Run various validations
-            result['issues'].extend(self.validate_imports(file_path, tree))
-            result['issues'].extend(self.validate_test_structure(file_path, tree))
-            result['issues'].extend(self.validate_mock_usage(file_path, tree))
+            import_issues, structure_issues, mock_issues = self._walk_once(tree)
+            result['issues'].extend(import_issues)
+            result['issues'].extend(structure_issues)
+            result['issues'].extend(mock_issues)
 
         except SyntaxError as e:
             result['issues'].append(f"Syntax error: {e}")
@@ -116,6 +146,24 @@ class TestValidator:
 
         return result
 
+    def _load_cache(self) -> Dict[str, Any]:
+        """Load cached results, keyed by path, as ((mtime_ns, size), result)
+
+        Results written by a different version of the validator are discarded.
+        """
+        try:
+            with open(CACHE_FILE, 'rb') as f:
+                fingerprint, cache = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+            return {}
+        return cache if fingerprint == _validator_fingerprint() else {}
+
+    def _save_cache(self, cache: Dict[str, Any]):
+        """Persist cached results for the next run, tagged with the validator fingerprint"""
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(CACHE_FILE, 'wb') as f:
+            pickle.dump((_validator_fingerprint(), cache), f)
+
     def validate_directory(self, test_dir: str) -> Dict[str, Any]:
         """Validate all test files in directory"""
         results = {
@@ -124,12 +172,34 @@ class TestValidator:
             'files': []
         }
 
-        for py_file in Path(test_dir).rglob("*.py"):
-            if py_file.name.startswith('test_'):
-                results['total_files'] += 1
-                file_result = self.validate_file(str(py_file))
-                results['files'].append(file_result)
-                results['total_issues'] += len(file_result['issues'])
+        stats = dict(_iter_test_files(test_dir))
+        test_files = list(stats)
+
+        # Files whose mtime and size match the cache reuse their previous result
+        cache = self._load_cache()
+        stamps = {}
+        file_results = {}
+        for path, st in stats.items():
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+            cached = cache.get(path)
+            if cached is not None and cached[0] == stamps[path]:
+                file_results[path] = cached[1]
+
+        pending = [path for path in test_files if path not in file_results]
+        if pending:
+            # Parsing is CPU-bound, so changed files are validated in parallel worker processes
+            with ProcessPoolExecutor() as executor:
+                pending_stats = [stats[path] for path in pending]
+                for path, file_result in zip(pending, executor.map(self.validate_file, pending, pending_stats)):
+                    file_results[path] = file_result
+                    cache[path] = (stamps[path], file_result)
+            self._save_cache(cache)
+
+        for path in test_files:
+            file_result = file_results[path]
+            results['total_files'] += 1
+            results['files'].append(file_result)
+            results['total_issues'] += len(file_result['issues'])
 
         return results
 